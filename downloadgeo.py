@@ -10,49 +10,171 @@
 # Version     : 2.7
 # License     : MIT
 # Python Ver  : 3.7+
-# Dependencies: requests, tqdm, beautifulsoup4
+# Dependencies: requests, beautifulsoup4, lxml (optional: tqdm, isal)
 
+import argparse
+import html
+import io
+import json
+import multiprocessing
 import os
+import re
+import shutil
+import subprocess
 import sys
+import tarfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from fnmatch import fnmatch
 from urllib.parse import urljoin
 
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def print_help():
-    print("""
-Usage:
-    downloadgeo GSEXXXXX[,GSEYYYYY,...] [--matrix | --raw] [--extract]
-    downloadgeo filename.txt --file [--matrix | --raw] [--extract]
-
-Options:
-    --matrix     Only download matrix files (series_matrix.txt.gz or -GPLxxx variants)
-    --raw        Only download raw files (RAW.tar, filelist.txt, etc. from suppl/)
-    --extract    Automatically extract .tar and .gz files after download
-    --file       Treat first argument as a .txt file containing one GEO ID per line
-    --help       Show this help message
-    --info       Show summary info from GEO webpage
+try:
+    from tqdm import tqdm
+    from tqdm.utils import CallbackIOWrapper
+except ImportError:
+    tqdm = None
+
+try:
+    # ISA-L's SIMD inflate is a drop-in, several times faster gzip reader.
+    from isal import igzip as gzip_mod
+except ImportError:
+    import gzip as gzip_mod
+
+COPY_BUFSIZE = 1 << 20
+WRITE_BUFSIZE = 256 * 1024
+PIGZ_THRESHOLD = 16 * 1024 * 1024
+CACHE_DIR = ".downloadgeo_cache"
+DROP_CACHE_THRESHOLD = 50 * 1024 * 1024
+MAX_FILE_WORKERS = 8
+DEFAULT_GEO_JOBS = 4
+PARALLEL_THRESHOLD = 50 * 1024 * 1024
+PARALLEL_CONNECTIONS = 4
+PARALLEL_PIECE_SIZE = 16 * 1024 * 1024
+
+# One shared session so every request reuses pooled keep-alive connections
+# to ftp.ncbi.nlm.nih.gov / www.ncbi.nlm.nih.gov instead of re-handshaking.
+SESSION = requests.Session()
+
+def configure_session(jobs=DEFAULT_GEO_JOBS):
+    # Size the per-host pool for the worst case, every file worker of every GEO
+    # job running a range-split download, so urllib3 never has to discard
+    # connections it could have kept alive.
+    SESSION.mount("https://", HTTPAdapter(
+        pool_connections=16, pool_maxsize=jobs * MAX_FILE_WORKERS * PARALLEL_CONNECTIONS,
+        max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=[502, 503, 504]),
+    ))
+
+configure_session()
+# HTML index and info pages compress well, so ask for gzip by default. File
+# bodies are fetched with IDENTITY_HEADERS instead: byte ranges and resume
+# offsets must refer to the file itself, not to a compressed representation.
+SESSION.headers.update({"User-Agent": "Mozilla/5.0", "Accept-Encoding": "gzip, deflate"})
+IDENTITY_HEADERS = {"Accept-Encoding": "identity"}
+
+# Index pages are plain directory listings, so a bytes regex over the raw
+# body is all that is needed to pull out the links.
+_HREF_RE = re.compile(rb'href="([^"]+)"', re.IGNORECASE)
+_GSE_RE = re.compile(r"^GSE\d+$")
+
+_print_lock = threading.Lock()
+# Set on Ctrl-C so download threads stop picking up new files.
+_stop = threading.Event()
+_listings = {}
+_extract_pool = None
+_extract_pool_lock = threading.Lock()
+
+def log(msg):
+    # Serialize output from worker threads so lines don't interleave, and go
+    # through tqdm.write when available so active progress bars aren't broken.
+    with _print_lock:
+        if tqdm is not None:
+            tqdm.write(msg)
+        else:
+            print(msg)
 
-If neither --matrix nor --raw is provided, both will be downloaded by default.
+def progress_bar(total, desc, initial=0):
+    # Byte-level progress bar for one file, or None without tqdm.
+    if tqdm is None:
+        return None
+    return tqdm(total=total or None, initial=initial, desc=desc,
+                unit="B", unit_scale=True, unit_divisor=1024, leave=False)
+
+def _track(fileobj, method, pbar):
+    return fileobj if pbar is None else CallbackIOWrapper(pbar.update, fileobj, method)
+
+def get_extract_pool():
+    # Decompression is CPU-bound, so it runs in worker processes. The pool is
+    # created on first use so importing this module never starts processes.
+    # Workers are never forked: forking while download threads are running
+    # can copy a held lock (e.g. _print_lock) into the child and hang it.
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _extract_pool = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                                mp_context=multiprocessing.get_context(method))
+        return _extract_pool
+
+def _positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value}")
+    return number
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="downloadgeo",
+        description="Batch download GEO datasets by GSE ID.",
+        usage="downloadgeo GSEXXXXX[,GSEYYYYY,...] [...] [--matrix | --raw] [--extract]\n"
+              "       downloadgeo filename.txt [...] --file [--matrix | --raw] [--extract]",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""If neither --matrix nor --raw is provided, both will be downloaded by default.
 
 Examples:
     downloadgeo GSE76275 --info
     downloadgeo GSE76275 --extract
     downloadgeo GSE76275,GSE11909 --matrix
     downloadgeo geo_ids.txt --file --raw --extract
-    """)
+    downloadgeo geo_ids.txt --file --jobs 8
+""")
+    parser.add_argument("ids", nargs="+",
+                        help="comma-separated GEO IDs, or .txt files with --file")
+    parser.add_argument("--matrix", action="store_true",
+                        help="Only download matrix files (series_matrix.txt.gz or -GPLxxx variants)")
+    parser.add_argument("--raw", action="store_true",
+                        help="Only download raw files (RAW.tar, filelist.txt, etc. from suppl/)")
+    parser.add_argument("--extract", action="store_true",
+                        help="Automatically extract .tar, .tar.gz and .gz files after download")
+    parser.add_argument("--file", action="store_true",
+                        help="Treat arguments as .txt files containing one GEO ID per line")
+    parser.add_argument("--info", action="store_true",
+                        help="Show summary info from GEO webpage")
+    parser.add_argument("--jobs", type=_positive_int, default=DEFAULT_GEO_JOBS, metavar="N",
+                        help=f"Number of GEO IDs to download in parallel (default: {DEFAULT_GEO_JOBS})")
+    parser.add_argument("--chunk-size", type=_positive_int, default=COPY_BUFSIZE, metavar="BYTES",
+                        help=f"Copy buffer size for downloads and extraction (default: {COPY_BUFSIZE})")
+    return parser
 
 def show_geo_info(geo_id):
-    import requests
-    from bs4 import BeautifulSoup
-
     url = f"https://www.ncbi.nlm.nih.gov/geo/query/acc.cgi?acc={geo_id}"
-    headers = {"User-Agent": "Mozilla/5.0"}
     try:
-        r = requests.get(url, headers=headers, timeout=15)
-        if r.status_code != 200:
-            print(f"\n❌ Failed to fetch info: HTTP {r.status_code}")
-            return
+        with SESSION.get(url, stream=True, timeout=15) as r:
+            if r.status_code != 200:
+                print(f"\n❌ Failed to fetch info: HTTP {r.status_code}")
+                return
+            # Hand the raw byte stream to lxml instead of decoding r.text
+            # first; lxml sniffs the charset itself.
+            r.raw.decode_content = True
+            soup = BeautifulSoup(r.raw, features="lxml")
 
-        soup = BeautifulSoup(r.text, "html.parser")
         rows = soup.find_all("tr", valign="top")
         print(f"\n📄 GEO Information for {geo_id}")
         print("=" * 70)
@@ -88,110 +210,486 @@ def get_geo_prefix(geo_id):
     else:
         return f"GSE{geo_id[3:-3]}nnn"
 
-def download_file_list(url, keyword=None):
-    import requests
-    from bs4 import BeautifulSoup
+def _listing_cache_path(url):
+    match = re.search(r"(GSE\d+)/", url)
+    return os.path.join(CACHE_DIR, f"{match.group(1) if match else 'other'}.json")
 
-    headers = {"User-Agent": "Mozilla/5.0"}
+def _fetch_listing(url):
+    # Directory listings are cached on disk per GSE ID together with their
+    # ETag / Last-Modified, and revalidated with a conditional GET so that
+    # unchanged directories cost a 304 instead of a full page.
+    cache_path = _listing_cache_path(url)
     try:
-        resp = requests.get(url, headers=headers, timeout=15)
-        if resp.status_code != 200 or not resp.text:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    entry = cache.get(url)
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    resp = SESSION.get(url, headers=headers, timeout=15)
+    if entry and resp.status_code == 304:
+        return tuple(entry["entries"])
+    if resp.status_code != 200 or not resp.content:
+        return None
+
+    # Keep relative links only: this drops absolute URLs, the parent
+    # directory link and the column-sort query links of the index page.
+    hrefs = [html.unescape(h.decode()) for h in _HREF_RE.findall(resp.content)]
+    entries = tuple(
+        href for href in hrefs
+        if not href.startswith(("http", "/", "?", ".."))
+    )
+
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if etag or last_modified:
+        cache[url] = {"etag": etag, "last_modified": last_modified, "entries": list(entries)}
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+    return entries
+
+def _get_listing(url):
+    # In-process memo on top of the disk cache. Only successful listings are
+    # kept, so a fallback that retries a failed directory really refetches it.
+    entries = _listings.get(url)
+    if entries is None:
+        entries = _fetch_listing(url)
+        if entries is not None:
+            _listings[url] = entries
+    return entries
+
+def download_file_list(url, keyword=None):
+    try:
+        entries = _get_listing(url)
+        if entries is None:
             return None
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        links = soup.find_all('a')
-        files = [
-            link.get('href') for link in links
-            if link.get('href') and not link.get('href').endswith('/')
-            and not link.get('href').startswith("http")
-        ]
+        files = [e for e in entries if not e.endswith('/')]
         if keyword:
             files = [f for f in files if keyword in f]
         return files
     except Exception as e:
-        print(f"⚠️ requests error: {e}")
+        log(f"⚠️ requests error: {e}")
         return None
 
-def extract_file(filepath):
-    import gzip
-    import shutil
-    import subprocess
+class _SendfileTarFile(tarfile.TarFile):
+    # Copies regular members of an uncompressed on-disk tar with os.sendfile,
+    # so member data goes file-to-file in the kernel instead of through a
+    # user-space buffer. Anything else uses the stock implementation.
+
+    def makefile(self, tarinfo, targetpath):
+        if (not sys.platform.startswith("linux") or not hasattr(os, "sendfile")
+                or tarinfo.sparse is not None
+                or not isinstance(self.fileobj, io.BufferedReader)):
+            return super().makefile(tarinfo, targetpath)
+
+        src_fd = self.fileobj.fileno()
+        offset = tarinfo.offset_data
+        remaining = tarinfo.size
+        with open(targetpath, "wb") as target:
+            while remaining:
+                sent = os.sendfile(target.fileno(), src_fd, offset, remaining)
+                if sent == 0:
+                    raise tarfile.ReadError("unexpected end of data")
+                offset += sent
+                remaining -= sent
+
+def extract_file(filepath, bufsize=COPY_BUFSIZE):
+    # Errors are logged here and reported by returning False, so callers can
+    # count failures without logging them twice. pigz spreads decompression
+    # over several cores; only worth the process spawn for large files.
+    pigz = shutil.which("pigz")
+    extract_dir = os.path.dirname(filepath) or "."
 
     if filepath.endswith(".gz") and not filepath.endswith(".tar.gz"):
         output_file = filepath[:-3]
         if os.path.exists(output_file):
-            print(f"✅ Skipping extract: {output_file} exists")
-            return
-        print(f"📦 Extracting .gz: {os.path.basename(filepath)}")
+            log(f"✅ Skipping extract: {output_file} exists")
+            return True
+        log(f"📦 Extracting .gz: {os.path.basename(filepath)}")
         try:
-            with gzip.open(filepath, 'rb') as f_in, open(output_file, 'wb') as f_out:
-                shutil.copyfileobj(f_in, f_out)
+            if pigz and os.path.getsize(filepath) > PIGZ_THRESHOLD:
+                subprocess.run([pigz, "-d", "-k", filepath], check=True)
+            else:
+                with gzip_mod.open(filepath, 'rb') as f_in, open(output_file, 'wb', buffering=WRITE_BUFSIZE) as f_out:
+                    shutil.copyfileobj(f_in, f_out, length=bufsize)
         except Exception as e:
-            print(f"❌ Failed to extract {filepath}: {e}")
+            log(f"❌ Failed to extract {filepath}: {e}")
+            # A truncated output would be skipped as "exists" on the next run.
+            if os.path.exists(output_file):
+                os.remove(output_file)
+            return False
+    elif filepath.endswith(".tar.gz"):
+        log(f"📦 Extracting .tar.gz: {os.path.basename(filepath)}")
+        try:
+            if pigz:
+                unzip = subprocess.Popen([pigz, "-dc", filepath], stdout=subprocess.PIPE)
+                try:
+                    subprocess.run(["tar", "-xf", "-", "-C", extract_dir], stdin=unzip.stdout, check=True)
+                finally:
+                    unzip.stdout.close()
+                    if unzip.wait() != 0:
+                        raise subprocess.CalledProcessError(unzip.returncode, unzip.args)
+            else:
+                subprocess.run(["tar", "-xzf", filepath, "-C", extract_dir], check=True)
+        except (subprocess.CalledProcessError, OSError) as e:
+            log(f"❌ Failed to extract {filepath}: {e}")
+            return False
     elif filepath.endswith(".tar"):
-        print(f"📦 Extracting .tar: {os.path.basename(filepath)}")
+        log(f"📦 Extracting .tar: {os.path.basename(filepath)}")
         try:
-            subprocess.run(["tar", "-xf", filepath], check=True)
-        except subprocess.CalledProcessError:
-            print(f"❌ Failed to extract {filepath}")
-
-def download_files_with_requests(base_url, files, outdir=".", extract=False):
-    import requests
-
+            with _SendfileTarFile.open(filepath, "r:") as tar:
+                if hasattr(tarfile, "data_filter"):
+                    tar.extractall(path=extract_dir, filter="data")
+                else:
+                    tar.extractall(path=extract_dir)
+        except (tarfile.TarError, OSError) as e:
+            log(f"❌ Failed to extract {filepath}: {e}")
+            return False
+    return True
+
+def _advise_sequential(fd):
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+def _drop_page_cache(fd):
+    # Sync once at the end and tell the kernel the written pages won't be
+    # reused, so multi-GB downloads don't push everything else out of the page
+    # cache on shared nodes. DONTNEED only drops clean pages, hence the sync.
+    if not sys.platform.startswith("linux") or os.fstat(fd).st_size < DROP_CACHE_THRESHOLD:
+        return
+    os.fdatasync(fd)
+    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+def _stream_download(file_url, out_path, fname, parallel=True, bufsize=COPY_BUFSIZE):
+    # Download into a .part file, resuming from its current size via an HTTP
+    # Range request, and only rename to out_path once the body is complete.
+    # Downloads of large files without a .part are handed to _parallel_get
+    # (which resumes its own .pdl) once the response headers show their size,
+    # so small files never pay for a HEAD.
+    part_path = out_path + ".part"
+    existing = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = dict(IDENTITY_HEADERS)
+    if existing:
+        headers["Range"] = f"bytes={existing}-"
+
+    with SESSION.get(file_url, headers=headers, stream=True, timeout=30) as r:
+        if existing and r.status_code == 416:
+            if r.headers.get("Content-Range") == f"bytes */{existing}":
+                # The .part file already holds the whole body.
+                os.replace(part_path, out_path)
+                return True
+            log(f"⚠️ Partial file for {fname} no longer matches remote, restarting")
+            os.remove(part_path)
+            return _stream_download(file_url, out_path, fname, bufsize=bufsize)
+
+        if r.status_code == 206:
+            if not r.headers.get("Content-Range", "").startswith(f"bytes {existing}-"):
+                # Server returned a different range than requested; appending
+                # would corrupt the file, so fall back to a full download.
+                log(f"⚠️ Server ignored resume offset for {fname}, restarting")
+                r.close()
+                os.remove(part_path)
+                return _stream_download(file_url, out_path, fname, bufsize=bufsize)
+            mode = 'ab'
+        elif r.status_code == 200:
+            size = int(r.headers.get("Content-Length", 0))
+            if (parallel and not existing and size > PARALLEL_THRESHOLD and hasattr(os, "pwrite")
+                    and r.headers.get("Accept-Ranges") == "bytes"):
+                r.close()
+                validator = r.headers.get("ETag") or r.headers.get("Last-Modified")
+                try:
+                    _parallel_get(file_url, out_path, size, fname, validator=validator, bufsize=bufsize)
+                    return True
+                except Exception as e:
+                    # Finished pieces are kept for the next run; only a
+                    # download that got nowhere is retried as one stream.
+                    if _stop.is_set() or os.path.exists(out_path + ".pdl"):
+                        raise
+                    log(f"⚠️ Parallel download of {fname} failed ({e}), retrying as single stream")
+                    return _stream_download(file_url, out_path, fname, parallel=False, bufsize=bufsize)
+            # Either a fresh download or the server ignored Range: start at byte 0.
+            mode = 'wb'
+        else:
+            log(f"❌ Failed to download {fname}, status code: {r.status_code}")
+            return False
+
+        # A leftover range-split download can't be continued as a single
+        # stream, so don't leave it behind as a multi-GB orphan.
+        _discard_parallel_state(out_path)
+        r.raw.decode_content = True
+        initial = existing if mode == 'ab' else 0
+        pbar = progress_bar(initial + int(r.headers.get("Content-Length", 0)), fname, initial)
+        try:
+            with open(part_path, mode, buffering=WRITE_BUFSIZE) as f:
+                _advise_sequential(f.fileno())
+                shutil.copyfileobj(r.raw, _track(f, "write", pbar), length=bufsize)
+                f.flush()
+                _drop_page_cache(f.fileno())
+        finally:
+            if pbar is not None:
+                pbar.close()
+
+    os.replace(part_path, out_path)
+    return True
+
+def _fetch_range(file_url, fd, start, end, pbar=None, bufsize=COPY_BUFSIZE):
+    headers = dict(IDENTITY_HEADERS, Range=f"bytes={start}-{end}")
+    with SESSION.get(file_url, headers=headers, stream=True, timeout=30) as r:
+        if r.status_code != 206:
+            raise IOError(f"range request returned HTTP {r.status_code}")
+        offset = start
+        for chunk in r.iter_content(chunk_size=bufsize):
+            os.pwrite(fd, chunk, offset)
+            offset += len(chunk)
+            if pbar is not None:
+                pbar.update(len(chunk))
+    if offset != end + 1:
+        raise IOError(f"short read for bytes {start}-{end}")
+
+def _parallel_get(file_url, out_path, size, fname, validator=None, n=PARALLEL_CONNECTIONS,
+                  bufsize=COPY_BUFSIZE):
+    # Fetch the file as PARALLEL_PIECE_SIZE byte ranges over n connections,
+    # written in place into a preallocated .pdl file. A .pdl.json sidecar
+    # lists the pieces already on disk, so an interrupted download only
+    # refetches the missing ones. The .pdl suffix keeps a full-size but
+    # half-filled file from ever being mistaken for a resumable .part.
+    tmp_path = out_path + ".pdl"
+    state_path = tmp_path + ".json"
+    pieces = [(a, min(a + PARALLEL_PIECE_SIZE, size) - 1) for a in range(0, size, PARALLEL_PIECE_SIZE)]
+    state = {"size": size, "validator": validator, "piece_size": PARALLEL_PIECE_SIZE}
+
+    done = set()
+    try:
+        with open(state_path) as f:
+            saved = json.load(f)
+        if (os.path.getsize(tmp_path) == size
+                and all(saved.get(key) == value for key, value in state.items())):
+            done = set(saved["done"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    def save_state():
+        with open(state_path + ".tmp", "w") as f:
+            json.dump(dict(state, done=sorted(done)), f)
+        os.replace(state_path + ".tmp", state_path)
+
+    if done:
+        log(f"⏯️ Resuming parallel download of {fname}: {len(done)}/{len(pieces)} pieces on disk")
+        fd = os.open(tmp_path, os.O_WRONLY)
+    else:
+        # Reset the sidecar before truncating, so a crash in between can't
+        # pair an empty file with a stale list of finished pieces.
+        save_state()
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    lock = threading.Lock()
+    failed = threading.Event()
+
+    def fetch(i):
+        if i in done or failed.is_set() or _stop.is_set():
+            return
+        try:
+            _fetch_range(file_url, fd, *pieces[i], pbar=pbar, bufsize=bufsize)
+        except BaseException:
+            failed.set()
+            raise
+        with lock:
+            done.add(i)
+            save_state()
+
+    pbar = progress_bar(size, fname, sum(end - start + 1 for i, (start, end) in enumerate(pieces) if i in done))
+    try:
+        if not done:
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(fd, 0, size)
+            else:
+                os.ftruncate(fd, size)
+        with ThreadPoolExecutor(max_workers=n) as ex:
+            list(ex.map(fetch, range(len(pieces))))
+        if len(done) < len(pieces):
+            raise IOError("download interrupted")
+        _drop_page_cache(fd)
+    except BaseException:
+        if not done:
+            _discard_parallel_state(out_path)
+        raise
+    finally:
+        os.close(fd)
+        if pbar is not None:
+            pbar.close()
+    os.replace(tmp_path, out_path)
+    os.remove(state_path)
+
+def _discard_parallel_state(out_path):
+    for path in (out_path + ".pdl", out_path + ".pdl.json"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def _stream_gunzip(file_url, output_file, fname, bufsize=COPY_BUFSIZE):
+    # Decompress a .gz response on the fly, so the compressed file never
+    # touches the disk. Like _stream_tar_from_url, files above
+    # PARALLEL_THRESHOLD are declined (returns False) and left to the
+    # resumable, range-split download followed by pigz-aware extraction.
+    tmp_path = output_file + ".tmp"
+    with SESSION.get(file_url, headers=IDENTITY_HEADERS, stream=True, timeout=30) as r:
+        if r.status_code != 200:
+            log(f"❌ Failed to download {fname}, status code: {r.status_code}")
+            return True
+        if int(r.headers.get("Content-Length", 0)) > PARALLEL_THRESHOLD:
+            return False
+        log(f"⬇️ Downloading + extracting (requests): {fname}")
+        r.raw.decode_content = True
+        pbar = progress_bar(int(r.headers.get("Content-Length", 0)), fname)
+        try:
+            with gzip_mod.open(_track(r.raw, "read", pbar), 'rb') as f_in, \
+                    open(tmp_path, 'wb', buffering=WRITE_BUFSIZE) as f_out:
+                shutil.copyfileobj(f_in, f_out, length=bufsize)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            if pbar is not None:
+                pbar.close()
+    os.replace(tmp_path, output_file)
+    return True
+
+def _stream_tar_from_url(file_url, outdir, fname):
+    # Unpack a .tar/.tar.gz straight from the HTTP response so the archive is
+    # never written to disk. A marker file records success, since there is no
+    # archive left behind to detect a finished download on the next run.
+    # A stream that breaks can only be restarted from byte 0, so archives
+    # above PARALLEL_THRESHOLD are declined (returns False) and left to the
+    # resumable, range-split download followed by pigz-aware extraction.
+    marker = os.path.join(outdir, f".{fname}.extracted")
+    if os.path.exists(marker):
+        log(f"✅ Skipping already extracted archive: {fname}")
+        return True
+    with SESSION.get(file_url, headers=IDENTITY_HEADERS, stream=True, timeout=30) as r:
+        if r.status_code != 200:
+            log(f"❌ Failed to download {fname}, status code: {r.status_code}")
+            return True
+        if int(r.headers.get("Content-Length", 0)) > PARALLEL_THRESHOLD:
+            return False
+        log(f"⬇️ Downloading + extracting (requests): {fname}")
+        r.raw.decode_content = True
+        pbar = progress_bar(int(r.headers.get("Content-Length", 0)), fname)
+        try:
+            with tarfile.open(fileobj=_track(r.raw, "read", pbar), mode="r|*") as tar:
+                if hasattr(tarfile, "data_filter"):
+                    tar.extractall(path=outdir, filter="data")
+                else:
+                    tar.extractall(path=outdir)
+        finally:
+            if pbar is not None:
+                pbar.close()
+    open(marker, 'w').close()
+    return True
+
+def download_files_with_requests(base_url, files, outdir=".", extract=False, bufsize=COPY_BUFSIZE):
+    # Returns the extraction futures so the caller can wait on them; completed
+    # downloads are unpacked in the process pool while later files download.
     os.makedirs(outdir, exist_ok=True)
-    for fname in files:
+    extract_futures = []
+
+    def _download_one(fname):
+        if _stop.is_set():
+            return
         file_url = urljoin(base_url, fname)
         out_path = os.path.join(outdir, fname)
 
+        # A partial download on disk is cheaper to resume than to stream again.
+        partial = os.path.exists(out_path + ".part") or os.path.exists(out_path + ".pdl")
+
+        if (extract and fname.endswith(".gz") and not fname.endswith(".tar.gz")
+                and not os.path.exists(out_path) and not partial):
+            output_file = out_path[:-3]
+            if os.path.exists(output_file):
+                log(f"✅ Skipping existing file: {os.path.basename(output_file)}")
+                return
+            try:
+                if _stream_gunzip(file_url, output_file, fname, bufsize=bufsize):
+                    return
+            except Exception as e:
+                log(f"❌ Error downloading {fname}: {e}")
+                return
+
+        if (extract and (fname.endswith(".tar") or fname.endswith(".tar.gz"))
+                and not os.path.exists(out_path) and not partial):
+            try:
+                if _stream_tar_from_url(file_url, outdir, fname):
+                    return
+            except Exception as e:
+                log(f"❌ Error downloading {fname}: {e}")
+                return
+
         if os.path.exists(out_path):
-            print(f"✅ Skipping existing file: {fname}")
+            log(f"✅ Skipping existing file: {fname}")
         else:
-            print(f"⬇️ Downloading (requests): {fname}")
+            if partial:
+                log(f"⏯️ Resuming (requests): {fname}")
+            else:
+                log(f"⬇️ Downloading (requests): {fname}")
             try:
-                with requests.get(file_url, stream=True, timeout=30) as r:
-                    if r.status_code == 200:
-                        with open(out_path, 'wb') as f:
-                            for chunk in r.iter_content(chunk_size=8192):
-                                if chunk:
-                                    f.write(chunk)
-                    else:
-                        print(f"❌ Failed to download {fname}, status code: {r.status_code}")
+                _stream_download(file_url, out_path, fname, bufsize=bufsize)
             except Exception as e:
-                print(f"❌ Error downloading {fname}: {e}")
+                log(f"❌ Error downloading {fname}: {e}")
 
         if extract:
-            extract_file(out_path)
-
-def fallback_with_wget(url, outdir, accept="*", extract=False):
-    import subprocess
-
-    print(f"🔁 Falling back to wget for: {url}")
-    subprocess.run([
-        "wget", "-r", "-np", "-nH", "--cut-dirs=5", "-P", outdir,
-        "--accept", accept, "-nc", url
-    ])
-    if extract:
-        for root, _, files in os.walk(outdir):
-            for fname in files:
-                if fname.endswith(".tar") or fname.endswith(".gz"):
-                    extract_file(os.path.join(root, fname))
-
-def fallback_download_matrix(geo_id, geo_prefix, outdir, extract=False):
-    import subprocess
-
-    fallback_url = f"https://ftp.ncbi.nlm.nih.gov/geo/series/{geo_prefix}/{geo_id}/matrix/{geo_id}_series_matrix.txt.gz"
-    out_path = os.path.join(outdir, f"{geo_id}_series_matrix.txt.gz")
-    if os.path.exists(out_path):
-        print(f"✅ Matrix already exists: {out_path}")
-    else:
-        print(f"🔁 Fallback direct download of matrix: {fallback_url}")
-        subprocess.run(["wget", "-nc", "-O", out_path, fallback_url])
-    if extract:
-        extract_file(out_path)
+            extract_futures.append(get_extract_pool().submit(extract_file, out_path, bufsize))
+
+    with ThreadPoolExecutor(max_workers=MAX_FILE_WORKERS) as ex:
+        list(ex.map(_download_one, files))
+
+    return extract_futures
 
-def download_geo(geo_id, download_raw=True, download_matrix=True, extract=False):
+def fallback_recursive_download(url, outdir, accept="*", extract=False, bufsize=COPY_BUFSIZE):
+    log(f"🔁 Falling back to recursive download for: {url}")
+    return _recursive_download(url, outdir, accept=accept, extract=extract, bufsize=bufsize)
+
+def _recursive_download(url, outdir, accept="*", extract=False, bufsize=COPY_BUFSIZE):
+    # Walk the index pages like wget -r -np would, but through the shared
+    # session and download pool. Returns the extraction futures.
+    try:
+        entries = _get_listing(url) or ()
+    except Exception as e:
+        log(f"⚠️ requests error: {e}")
+        return []
+
+    extract_futures = []
+    files = [e for e in entries if not e.endswith('/') and fnmatch(e, accept)]
+    if files:
+        extract_futures += download_files_with_requests(url, files, outdir=outdir, extract=extract, bufsize=bufsize)
+    for subdir in (e for e in entries if e.endswith('/')):
+        if _stop.is_set():
+            break
+        extract_futures += _recursive_download(
+            urljoin(url, subdir), os.path.join(outdir, subdir.rstrip('/')),
+            accept=accept, extract=extract, bufsize=bufsize,
+        )
+    return extract_futures
+
+def fallback_download_matrix(geo_id, geo_prefix, outdir, extract=False, bufsize=COPY_BUFSIZE):
+    # The matrix listing couldn't be read, so fetch the usual file name
+    # directly. Returns the extraction futures.
+    matrix_url = f"https://ftp.ncbi.nlm.nih.gov/geo/series/{geo_prefix}/{geo_id}/matrix/"
+    fname = f"{geo_id}_series_matrix.txt.gz"
+    log(f"🔁 Fallback direct download of matrix: {matrix_url}{fname}")
+    return download_files_with_requests(matrix_url, [fname], outdir=outdir, extract=extract, bufsize=bufsize)
+
+def download_geo(geo_id, download_raw=True, download_matrix=True, extract=False, bufsize=COPY_BUFSIZE):
     geo_id = geo_id.strip().upper()
     if not geo_id.startswith("GSE") or not geo_id[3:].isdigit():
-        print(f"❌ Invalid GEO ID: {geo_id}")
+        log(f"❌ Invalid GEO ID: {geo_id}")
         return
 
     geo_prefix = get_geo_prefix(geo_id)
@@ -199,24 +697,42 @@ def download_geo(geo_id, download_raw=True, download_matrix=True, extract=False)
     suppl_url = main_url + "suppl/"
     matrix_url = main_url + "matrix/"
     os.makedirs(geo_id, exist_ok=True)
+    extract_futures = []
 
     if download_raw:
-        print(f"\n📁 [{geo_id}] Checking supplementary files at: {suppl_url}")
+        log(f"\n📁 [{geo_id}] Checking supplementary files at: {suppl_url}")
         suppl_files = download_file_list(suppl_url)
         if suppl_files:
-            download_files_with_requests(suppl_url, suppl_files, outdir=geo_id, extract=extract)
+            extract_futures += download_files_with_requests(suppl_url, suppl_files, outdir=geo_id,
+                                                            extract=extract, bufsize=bufsize)
         else:
-            fallback_with_wget(suppl_url, outdir=geo_id, accept="*", extract=extract)
+            extract_futures += fallback_recursive_download(suppl_url, outdir=geo_id, accept="*",
+                                                           extract=extract, bufsize=bufsize)
 
-    if download_matrix:
-        print(f"\n📁 [{geo_id}] Checking matrix file(s) at: {matrix_url}")
+    if download_matrix and not _stop.is_set():
+        log(f"\n📁 [{geo_id}] Checking matrix file(s) at: {matrix_url}")
         matrix_files = download_file_list(matrix_url, keyword="series_matrix")
         if matrix_files:
-            download_files_with_requests(matrix_url, matrix_files, outdir=geo_id, extract=extract)
+            extract_futures += download_files_with_requests(matrix_url, matrix_files, outdir=geo_id,
+                                                            extract=extract, bufsize=bufsize)
         else:
-            fallback_download_matrix(geo_id, geo_prefix, geo_id, extract=extract)
+            extract_futures += fallback_download_matrix(geo_id, geo_prefix, geo_id,
+                                                        extract=extract, bufsize=bufsize)
 
-    print(f"✅ [{geo_id}] Download complete.")
+    failed = 0
+    for future in extract_futures:
+        try:
+            if future.result() is False:
+                failed += 1
+        except Exception as e:
+            log(f"❌ [{geo_id}] Extraction failed: {e!r}")
+            failed += 1
+    if _stop.is_set():
+        log(f"⏸️ [{geo_id}] Interrupted before all files were downloaded.")
+    elif failed:
+        log(f"⚠️ [{geo_id}] Download complete, but {failed} extraction(s) failed.")
+    else:
+        log(f"✅ [{geo_id}] Download complete.")
 
 def parse_geo_list_from_file(filename):
     geo_list = []
@@ -228,32 +744,62 @@ def parse_geo_list_from_file(filename):
     return geo_list
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2 or "--help" in sys.argv:
-        print_help()
+    parser = build_parser()
+    if len(sys.argv) < 2:
+        parser.print_help()
         sys.exit(0)
+    args = parser.parse_args()
 
-    is_file_mode = "--file" in sys.argv
-    extract = "--extract" in sys.argv
-    download_raw = "--raw" in sys.argv or ("--matrix" not in sys.argv and "--raw" not in sys.argv)
-    download_matrix = "--matrix" in sys.argv or ("--matrix" not in sys.argv and "--raw" not in sys.argv)
-
-    if is_file_mode:
-        txt_file = sys.argv[1]
-        if not os.path.exists(txt_file):
-            print(f"❌ File not found: {txt_file}")
-            sys.exit(1)
-        geo_list = parse_geo_list_from_file(txt_file)
-    else:
-        geo_input = sys.argv[1]
-        geo_list = [g.strip() for g in geo_input.split(",") if g.strip()]
-    from tqdm import tqdm
-    geo_iter = tqdm(geo_list, desc="Processing GEOs") if len(geo_list) > 1 else geo_list
+    configure_session(args.jobs)
+    # Both kinds are downloaded unless exactly one was asked for.
+    download_raw = args.raw or not args.matrix
+    download_matrix = args.matrix or not args.raw
+
+    geo_list = []
+    for item in args.ids:
+        if args.file:
+            if not os.path.exists(item):
+                print(f"❌ File not found: {item}")
+                sys.exit(1)
+            geo_list += parse_geo_list_from_file(item)
+        else:
+            geo_list += [g.strip() for g in item.split(",") if g.strip()]
 
-    if "--info" in sys.argv:
+    normalized = [g.strip().upper() for g in geo_list]
+    rejected = [g for g in normalized if not _GSE_RE.match(g)]
+    if rejected:
+        print(f"⚠️ Ignoring invalid GEO ID(s): {', '.join(rejected)}")
+    # Drop duplicates (keeping the first occurrence) so each series is only fetched once.
+    geo_list = list(dict.fromkeys(g for g in normalized if _GSE_RE.match(g)))
+
+    if args.info:
         for geo_id in geo_list:
             show_geo_info(geo_id)
         sys.exit(0)
 
-    for geo_id in geo_iter:
-        download_geo(geo_id, download_raw=download_raw, download_matrix=download_matrix, extract=extract)
-    print('Thank you for using downloadgeo, developed by ww!')
\ No newline at end of file
+    interrupted = False
+    with ThreadPoolExecutor(max_workers=args.jobs) as ex:
+        futures = [
+            ex.submit(download_geo, geo_id, download_raw=download_raw,
+                      download_matrix=download_matrix, extract=args.extract,
+                      bufsize=args.chunk_size)
+            for geo_id in geo_list
+        ]
+        done = as_completed(futures)
+        if tqdm is not None and len(geo_list) > 1:
+            done = tqdm(done, total=len(futures), desc="Processing GEOs")
+        try:
+            for future in done:
+                future.result()
+        except KeyboardInterrupt:
+            # Leaving the with block waits for every queued GEO ID, so drop
+            # the ones that haven't started and stop the running ones from
+            # starting new files.
+            interrupted = True
+            _stop.set()
+            for future in futures:
+                future.cancel()
+            log("🛑 Interrupted, waiting for files in progress to finish; rerun to resume.")
+    if interrupted:
+        sys.exit(130)
+    print('Thank you for using downloadgeo, developed by ww!')